@@ -12,17 +12,47 @@ Usage:
 """
 
 import argparse
+import asyncio
+import email.utils
+import functools
+import gzip
+import base64
+import io
 import json
+import mimetypes
 import os
 import re
 import hashlib
+import pickle
+import sqlite3
+import string
+import sys
+import types
+from collections import defaultdict
+from contextlib import ExitStack, closing
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
-from dateutil import parser as date_parser
-from typing import Optional, List, Dict
+from typing import TYPE_CHECKING, Optional, Dict, FrozenSet, TextIO, Union
+from urllib.parse import urlparse, urlsplit, urlunsplit
 import feedparser
-import requests
-from anthropic import Anthropic
+import httpx
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache
+from markupsafe import Markup
+
+# anthropic takes over a second to import and --list-articles never needs it,
+# so it's imported where the client is built
+if TYPE_CHECKING:
+    from anthropic import Anthropic
+
+try:
+    # Optional, faster JSON for Claude's replies, the response cache and user sources
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:
+    json_loads = json.loads
+    
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
 
 # =============================================================================
 # CONFIGURATION
@@ -30,8 +60,36 @@ from anthropic import Anthropic
 
 DEFAULT_RECIPIENT_NAME = "Reader"
 
+CLAUDE_MODEL = "claude-sonnet-4-20250514"
+
+# On-disk cache for Claude responses (reused when the same prompt is re-run)
+CACHE_DIR = Path("~/.cache/events_newsletter").expanduser()
+LLM_CACHE_TTL = 24 * 3600  # Seconds a cached Claude response stays valid
+
+# Claude prompt sizing - article bodies are trimmed adaptively to stay within budget
+MAX_PROMPT_ARTICLES = 60
+ARTICLES_TOKEN_BUDGET = 18000  # Leaves ~2K tokens for the writing instructions
+MIN_ARTICLE_CHARS = 200
+MAX_ARTICLE_CHARS = 800
+
+# Articles with at least this much identical body text are duplicates, whatever their URL
+DUPLICATE_BODY_MIN_CHARS = 200
+
+# Feed downloads - pooled keep-alive connections, HTTP/2 where supported
+HTTP_HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+MAX_REQUESTS_PER_HOST = 2  # Avoid hammering sites that host several feeds
+FEED_BATCH_TIMEOUT = 30  # Seconds allowed for the whole download batch
+FALLBACK_FETCH_WORKERS = 16  # Threads retrying feeds that failed to download
+USER_SOURCE_WORKERS = min(32, (os.cpu_count() or 1) * 4)  # Threads reading user source files
+
+# ETag / Last-Modified per feed URL, with the last body, for conditional GETs
+FEED_CACHE_DB = CACHE_DIR / "feeds.sqlite"
+PARSED_FEED_TTL = 3600  # Seconds parsed entries are reused for an identical feed body
+
 # Industry-specific RSS feeds - EDIT THIS LIST TO ADD/REMOVE SOURCES
-RSS_FEEDS = {
+# (read-only at runtime; pass custom_feeds to generate_newsletter to override)
+RSS_FEEDS = types.MappingProxyType({
     # ===========================================
     # EXHIBITION & EVENTS INDUSTRY
     # ===========================================
@@ -88,7 +146,7 @@ RSS_FEEDS = {
     "AdWeek": "https://www.adweek.com/feed/",
     "Digiday": "https://digiday.com/feed/",
     "MediaPost": "https://www.mediapost.com/publications/index.cfm?rss=true",
-}
+})
 
 
 # Section definitions
@@ -113,8 +171,239 @@ SECTIONS = {
     }
 }
 
-# HTML Template - Helvetica 10pt, clean design
+# Derived section fields, computed once: a lower-case title for the "No significant ...
+# this period" line, plus icon and title as ready-escaped Markup so the HTML
+# autoescaper passes them straight through on every render
+for section_config in SECTIONS.values():
+    section_config["title_lower"] = section_config["title"].lower()
+    section_config["title_html"] = Markup.escape(section_config["title"])
+    section_config["icon"] = Markup(section_config["icon"])
+
+# Sections in display order, as (key, config) pairs
+SECTION_ORDER = tuple(SECTIONS.items())
+
+# Precompiled patterns for text cleanup and dedup
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+WHITESPACE_RE = re.compile(r'\s+')
+HTML_WHITESPACE_RE = re.compile(r'\n\s+')  # Indentation and blank lines in rendered HTML
+CSS_PUNCTUATION_RE = re.compile(r'\s*([{};:,>])\s*')
+NON_ALNUM_RE = re.compile(r'[^a-z0-9]')
+MARKDOWN_TITLE_RE = re.compile(r'(?m)^#\s+(.+)$')
+
+# Every ASCII byte NON_ALNUM_RE would strip - bytes.translate deletes them far faster for ASCII titles
+ASCII_NON_ALNUM_BYTES = bytes(
+    c for c in range(128) if chr(c) not in string.ascii_lowercase + string.digits
+)
+
+# Keywords that push an article up the selection list
+HIGH_PRIORITY_KEYWORDS = (
+    "investment", "investor", "private equity", "PE", "acquisition", "acquire",
+    "merger", "M&A", "funding", "capital", "valuation", "IPO", "stake",
+    "buy", "sell", "deal", "transaction", "billion", "million",
+    "global", "international", "cross-border", "export", "import", "trade",
+    "foreign", "overseas", "expansion", "enter", "market entry", "launch",
+    "Asia", "Europe", "Americas", "Middle East", "China", "India", "US", "UK",
+    "Germany", "France", "Dubai", "Singapore", "emerging market",
+    "revenue", "growth", "profit", "margin", "earnings", "forecast",
+    "outlook", "performance", "results", "quarter", "annual",
+    "strategy", "restructur", "pivot", "shift", "transform", "digital",
+    "CEO", "appoint", "hire", "depart", "leadership"
+)
+KEYWORDS_LOWER = tuple((kw.lower(), kw) for kw in HIGH_PRIORITY_KEYWORDS)
+
+# Newsletter stylesheet - Helvetica 10pt, clean design
 # Logo background color: #6C9F7F (matched from logo image)
+NEWSLETTER_CSS = """
+* { box-sizing: border-box; }
+body {
+    font-family: Helvetica, Arial, sans-serif;
+    font-size: 10pt;
+    max-width: 680px;
+    margin: 0 auto;
+    padding: 20px;
+    background: #ffffff;
+    color: #1a1a1a;
+    line-height: 1.6;
+}
+.logo-banner {
+    background: #6C9F7F;
+    padding: 25px 20px;
+    text-align: center;
+    border-radius: 8px 8px 0 0;
+}
+.logo-banner img {
+    max-width: 240px;
+    height: auto;
+}
+.logo-text {
+    color: white;
+    font-size: 18pt;
+    font-weight: bold;
+    letter-spacing: 1px;
+}
+.header {
+    background: #6C9F7F;
+    padding: 0 20px 20px 20px;
+    margin-bottom: 25px;
+    border-radius: 0 0 8px 8px;
+    text-align: center;
+}
+.header h1 {
+    font-size: 16pt;
+    font-weight: 800;
+    margin: 0 0 5px 0;
+    color: #ffffff;
+}
+.header .tagline {
+    color: rgba(255,255,255,0.85);
+    font-size: 9pt;
+    margin-bottom: 8px;
+}
+.header .date {
+    font-size: 8pt;
+    color: rgba(255,255,255,0.7);
+    font-weight: 600;
+    text-transform: uppercase;
+    letter-spacing: 1px;
+}
+.executive-summary {
+    background: #f8f9fa;
+    border-left: 4px solid #6C9F7F;
+    padding: 20px;
+    margin-bottom: 30px;
+}
+.executive-summary p {
+    margin: 0 0 15px 0;
+}
+.executive-summary ul {
+    margin: 15px 0;
+    padding-left: 20px;
+    list-style-type: disc;
+}
+.executive-summary li {
+    margin-bottom: 10px;
+    line-height: 1.5;
+}
+.section {
+    margin-bottom: 35px;
+}
+.section-header {
+    display: flex;
+    align-items: center;
+    border-bottom: 2px solid #6C9F7F;
+    padding-bottom: 8px;
+    margin-bottom: 20px;
+}
+.section-header h2 {
+    font-size: 12pt;
+    font-weight: 800;
+    margin: 0;
+    color: #1a1a1a;
+}
+.section-header .icon {
+    font-size: 12pt;
+    margin-right: 8px;
+}
+.sub-theme {
+    font-size: 9pt;
+    font-weight: 700;
+    color: #5a7a5a;
+    text-transform: uppercase;
+    letter-spacing: 1px;
+    margin: 20px 0 12px 0;
+    padding-bottom: 5px;
+    border-bottom: 1px dashed #6C9F7F;
+}
+.story {
+    margin-bottom: 25px;
+    padding-bottom: 20px;
+    border-bottom: 1px solid #eee;
+}
+.story:last-child {
+    border-bottom: none;
+}
+.story h3 {
+    font-size: 11pt;
+    font-weight: 700;
+    margin: 0 0 8px 0;
+    line-height: 1.3;
+}
+.story .meta {
+    font-size: 8pt;
+    color: #888;
+    margin-bottom: 12px;
+}
+.story .meta a {
+    color: #5a7a5a;
+    text-decoration: none;
+}
+.story .meta a:hover {
+    text-decoration: underline;
+}
+.story .synopsis {
+    font-size: 10pt;
+    line-height: 1.6;
+    color: #333;
+    margin: 12px 0;
+}
+.story .label {
+    font-weight: 700;
+    color: #5a7a5a;
+    font-size: 8pt;
+    text-transform: uppercase;
+    display: block;
+    margin-top: 10px;
+    margin-bottom: 4px;
+}
+.story ul {
+    margin: 0 0 10px 0;
+    padding-left: 18px;
+}
+.story li {
+    margin-bottom: 5px;
+    line-height: 1.5;
+}
+.story .source-link {
+    font-size: 8pt;
+    color: #5a7a5a;
+    text-decoration: none;
+    font-weight: 600;
+    display: inline-block;
+    margin-top: 8px;
+}
+.story .source-link:hover {
+    text-decoration: underline;
+}
+.footer {
+    background: #6C9F7F;
+    margin-top: 40px;
+    padding: 20px;
+    border-radius: 8px;
+    text-align: center;
+    font-size: 8pt;
+    color: rgba(255,255,255,0.8);
+}
+.footer a {
+    color: #ffffff;
+}
+.no-stories {
+    color: #888;
+    font-style: italic;
+}
+"""
+
+
+def minify_css(css: str) -> str:
+    """Drop whitespace that CSS doesn't need (around braces, colons, semicolons, commas)."""
+    css = CSS_PUNCTUATION_RE.sub(r'\1', css)
+    css = WHITESPACE_RE.sub(' ', css)
+    return css.replace(';}', '}').strip()
+
+
+# Minified once at import and injected into every HTML render
+NEWSLETTER_CSS_MIN = Markup(minify_css(NEWSLETTER_CSS))
+
+# HTML Template
 HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html>
@@ -122,193 +411,10 @@ HTML_TEMPLATE = """
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{{ title }}</title>
-    <style>
-        * { box-sizing: border-box; }
-        body {
-            font-family: Helvetica, Arial, sans-serif;
-            font-size: 10pt;
-            max-width: 680px;
-            margin: 0 auto;
-            padding: 20px;
-            background: #ffffff;
-            color: #1a1a1a;
-            line-height: 1.6;
-        }
-        .logo-banner {
-            background: #6C9F7F;
-            padding: 25px 20px;
-            text-align: center;
-            border-radius: 8px 8px 0 0;
-        }
-        .logo-banner img {
-            max-width: 240px;
-            height: auto;
-        }
-        .logo-text {
-            color: white;
-            font-size: 18pt;
-            font-weight: bold;
-            letter-spacing: 1px;
-        }
-        .header {
-            background: #6C9F7F;
-            padding: 0 20px 20px 20px;
-            margin-bottom: 25px;
-            border-radius: 0 0 8px 8px;
-            text-align: center;
-        }
-        .header h1 {
-            font-size: 16pt;
-            font-weight: 800;
-            margin: 0 0 5px 0;
-            color: #ffffff;
-        }
-        .header .tagline {
-            color: rgba(255,255,255,0.85);
-            font-size: 9pt;
-            margin-bottom: 8px;
-        }
-        .header .date {
-            font-size: 8pt;
-            color: rgba(255,255,255,0.7);
-            font-weight: 600;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }
-        .executive-summary {
-            background: #f8f9fa;
-            border-left: 4px solid #6C9F7F;
-            padding: 20px;
-            margin-bottom: 30px;
-        }
-        .executive-summary p {
-            margin: 0 0 15px 0;
-        }
-        .executive-summary ul {
-            margin: 15px 0;
-            padding-left: 20px;
-            list-style-type: disc;
-        }
-        .executive-summary li {
-            margin-bottom: 10px;
-            line-height: 1.5;
-        }
-        .section {
-            margin-bottom: 35px;
-        }
-        .section-header {
-            display: flex;
-            align-items: center;
-            border-bottom: 2px solid #6C9F7F;
-            padding-bottom: 8px;
-            margin-bottom: 20px;
-        }
-        .section-header h2 {
-            font-size: 12pt;
-            font-weight: 800;
-            margin: 0;
-            color: #1a1a1a;
-        }
-        .section-header .icon {
-            font-size: 12pt;
-            margin-right: 8px;
-        }
-        .sub-theme {
-            font-size: 9pt;
-            font-weight: 700;
-            color: #5a7a5a;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-            margin: 20px 0 12px 0;
-            padding-bottom: 5px;
-            border-bottom: 1px dashed #6C9F7F;
-        }
-        .story {
-            margin-bottom: 25px;
-            padding-bottom: 20px;
-            border-bottom: 1px solid #eee;
-        }
-        .story:last-child {
-            border-bottom: none;
-        }
-        .story h3 {
-            font-size: 11pt;
-            font-weight: 700;
-            margin: 0 0 8px 0;
-            line-height: 1.3;
-        }
-        .story .meta {
-            font-size: 8pt;
-            color: #888;
-            margin-bottom: 12px;
-        }
-        .story .meta a {
-            color: #5a7a5a;
-            text-decoration: none;
-        }
-        .story .meta a:hover {
-            text-decoration: underline;
-        }
-        .story .synopsis {
-            font-size: 10pt;
-            line-height: 1.6;
-            color: #333;
-            margin: 12px 0;
-        }
-        .story .label {
-            font-weight: 700;
-            color: #5a7a5a;
-            font-size: 8pt;
-            text-transform: uppercase;
-            display: block;
-            margin-top: 10px;
-            margin-bottom: 4px;
-        }
-        .story ul {
-            margin: 0 0 10px 0;
-            padding-left: 18px;
-        }
-        .story li {
-            margin-bottom: 5px;
-            line-height: 1.5;
-        }
-        .story .source-link {
-            font-size: 8pt;
-            color: #5a7a5a;
-            text-decoration: none;
-            font-weight: 600;
-            display: inline-block;
-            margin-top: 8px;
-        }
-        .story .source-link:hover {
-            text-decoration: underline;
-        }
-        .footer {
-            background: #6C9F7F;
-            margin-top: 40px;
-            padding: 20px;
-            border-radius: 8px;
-            text-align: center;
-            font-size: 8pt;
-            color: rgba(255,255,255,0.8);
-        }
-        .footer a {
-            color: #ffffff;
-        }
-        .no-stories {
-            color: #888;
-            font-style: italic;
-        }
-    </style>
+    <style>{{ css }}</style>
 </head>
 <body>
-    <div class="logo-banner">
-        {% if logo_url %}
-        <img src="{{ logo_url }}" alt="Second Curve Consulting">
-        {% else %}
-        <div class="logo-text">SECOND CURVE CONSULTING</div>
-        {% endif %}
-    </div>
+    {{ logo_banner }}
     <div class="header">
         <h1>{{ title }}</h1>
         <div class="tagline">Intelligence for the global B2B media, exhibitions & events industry</div>
@@ -317,61 +423,63 @@ HTML_TEMPLATE = """
     
     {% if executive_summary %}
     <div class="executive-summary">
-        {{ executive_summary | safe }}
+        {{ executive_summary }}
     </div>
     {% endif %}
     
-    {% for section_key, section_data in sections.items() %}
+    {% for section_key, section_data in sections %}
     <div class="section">
         <div class="section-header">
             <span class="icon">{{ section_data.icon }}</span>
-            <h2>{{ section_data.title }}</h2>
+            <h2>{{ section_data.title_html }}</h2>
         </div>
         
         {% if section_data.stories %}
-            {% if section_data.sub_themes %}
-                {% for sub_theme in section_data.sub_themes %}
-                <div class="sub-theme">{{ sub_theme }}</div>
-                {% for story in section_data.stories %}
-                {% if story.sub_theme == sub_theme %}
-                <div class="story">
-                    <h3>{{ story.headline }}</h3>
-                    <div class="meta">
-                        {% if story.link %}<a href="{{ story.link }}" target="_blank">{{ story.source_display }}</a>{% else %}{{ story.source_display }}{% endif %} • {{ story.published }}
-                    </div>
-                    {{ story.summary | safe }}
-                </div>
-                {% endif %}
-                {% endfor %}
-                {% endfor %}
-            {% else %}
-                {% for story in section_data.stories %}
-                <div class="story">
-                    <h3>{{ story.headline }}</h3>
-                    <div class="meta">
-                        {% if story.link %}<a href="{{ story.link }}" target="_blank">{{ story.source_display }}</a>{% else %}{{ story.source_display }}{% endif %} • {{ story.published }}
-                    </div>
-                    {{ story.summary | safe }}
-                    {% if story.link %}
-                    <a href="{{ story.link }}" target="_blank" class="source-link">Read source →</a>
-                    {% endif %}
-                </div>
-                {% endfor %}
-            {% endif %}
+            {{ stories_html[section_key] }}
         {% else %}
-            <p class="no-stories">No significant {{ section_data.title.lower() }} this period.</p>
+            <p class="no-stories">No significant {{ section_data.title_lower }} this period.</p>
         {% endif %}
     </div>
     {% endfor %}
     
-    <div class="footer">
-        {{ footer_text | default('Published by Second Curve Consulting') }}<br>
-        <a href="https://secondcurveconsulting.com">secondcurveconsulting.com</a>
-    </div>
+    {{ footer_html }}
 </body>
 </html>
 """
 
+# One story in the HTML newsletter - sections are prerendered from this in Python
+STORY_TEMPLATE = """
+<div class="story">
+    <h3>{{ story.headline }}</h3>
+    <div class="meta">
+        {% if story.article.link %}<a href="{{ story.article.link }}" target="_blank">{{ story.article.source_display }}</a>{% else %}{{ story.article.source_display }}{% endif %} • {{ story.article.published }}
+    </div>
+    {{ story.summary }}
+    {% if source_link and story.article.link %}
+    <a href="{{ story.article.link }}" target="_blank" class="source-link">Read source →</a>
+    {% endif %}
+</div>
+"""
+
+# Static HTML fragments - rendered once per distinct logo / footer text
+LOGO_BANNER_TEMPLATE = """
+<div class="logo-banner">
+    {% if logo_url %}
+    <img src="{{ logo_url }}" alt="Second Curve Consulting">
+    {% else %}
+    <div class="logo-text">SECOND CURVE CONSULTING</div>
+    {% endif %}
+</div>
+"""
+
+FOOTER_TEMPLATE = """
+<div class="footer">
+    {{ footer_text | default('Published by Second Curve Consulting') }}<br>
+    <a href="https://secondcurveconsulting.com">secondcurveconsulting.com</a>
+</div>
+"""
+
+# Reference Markdown layout only - never compiled; render_markdown() writes this document directly
 MARKDOWN_TEMPLATE = """# {{ title }}
 
 *Intelligence for the global B2B media, exhibitions & events industry*
@@ -386,38 +494,36 @@ MARKDOWN_TEMPLATE = """# {{ title }}
 ---
 {% endif %}
 
-{% for section_key, section_data in sections.items() %}
+{% for section_key, section_data in sections %}
 ## {{ section_data.icon }} {{ section_data.title }}
 
 {% if section_data.stories %}
 {% if section_data.sub_themes %}
-{% for sub_theme in section_data.sub_themes %}
+{% for sub_theme, theme_stories in section_data.stories_by_theme.items() %}
 ### {{ sub_theme }}
 
-{% for story in section_data.stories %}
-{% if story.sub_theme == sub_theme %}
+{% for story in theme_stories %}
 #### {{ story.headline }}
 
-*{{ story.source_display }} • {{ story.published }}*
+*{{ story.article.source_display }} • {{ story.article.published }}*
 
 {{ story.summary }}
 
-{% if story.link %}[Read source →]({{ story.link }}){% endif %}
+{% if story.article.link %}[Read source →]({{ story.article.link }}){% endif %}
 
 ---
 
-{% endif %}
 {% endfor %}
 {% endfor %}
 {% else %}
 {% for story in section_data.stories %}
 ### {{ story.headline }}
 
-*{{ story.source_display }} • {{ story.published }}*
+*{{ story.article.source_display }} • {{ story.article.published }}*
 
 {{ story.summary }}
 
-{% if story.link %}[Read source →]({{ story.link }}){% endif %}
+{% if story.article.link %}[Read source →]({{ story.article.link }}){% endif %}
 
 ---
 
@@ -425,7 +531,7 @@ MARKDOWN_TEMPLATE = """# {{ title }}
 {% endif %}
 
 {% else %}
-*No significant {{ section_data.title.lower() }} this period.*
+*No significant {{ section_data.title_lower }} this period.*
 {% endif %}
 
 {% endfor %}
@@ -435,93 +541,482 @@ MARKDOWN_TEMPLATE = """# {{ title }}
 *{{ footer_text | default('Published by Second Curve Consulting') }}*
 """
 
+# HTML templates are compiled once at import, autoescaped and with block
+# whitespace trimmed.
+# Compiled bytecode is cached on disk so later runs skip parsing entirely,
+# unless the cache directory can't be written (e.g. a read-only HOME).
+try:
+    (CACHE_DIR / "jinja").mkdir(parents=True, exist_ok=True)
+except OSError:
+    TEMPLATE_BYTECODE_CACHE = None
+else:
+    TEMPLATE_BYTECODE_CACHE = (
+        FileSystemBytecodeCache(str(CACHE_DIR / "jinja"))
+        if os.access(CACHE_DIR / "jinja", os.W_OK) else None
+    )
+TEMPLATE_LOADER = DictLoader({
+    "newsletter.html": HTML_TEMPLATE,
+    "story.html": STORY_TEMPLATE,
+    "logo_banner.html": LOGO_BANNER_TEMPLATE,
+    "footer.html": FOOTER_TEMPLATE,
+})
+
+HTML_ENV = Environment(
+    loader=TEMPLATE_LOADER, bytecode_cache=TEMPLATE_BYTECODE_CACHE,
+    autoescape=True, trim_blocks=True, lstrip_blocks=True
+)
+
+TEMPLATES = {
+    "html": HTML_ENV.get_template("newsletter.html"),
+    "story": HTML_ENV.get_template("story.html"),
+    "logo_banner": HTML_ENV.get_template("logo_banner.html"),
+    "footer": HTML_ENV.get_template("footer.html"),
+}
+
 # =============================================================================
 # CORE FUNCTIONS
 # =============================================================================
 
+@functools.lru_cache(maxsize=4)
+def get_claude_client(api_key: str) -> "Anthropic":
+    """Return one Anthropic client per API key, so every call in a run shares its HTTP/2 connection."""
+    from anthropic import Anthropic, DefaultHttpxClient
+    
+    return Anthropic(api_key=api_key, http_client=DefaultHttpxClient(http2=True))
+
+
+def call_claude(
+    client: "Anthropic",
+    prompt: str,
+    max_tokens: int,
+    use_cache: bool = True,
+    cache_ttl: float = LLM_CACHE_TTL,
+    system: Optional[str] = None,
+    context: Optional[str] = None
+) -> str:
+    """Send a single-message prompt to Claude, reusing a cached response for identical prompts.
+    
+    Cached responses older than cache_ttl seconds are ignored and replaced.
+    The system text and context block (sent ahead of the prompt) are marked
+    for Anthropic's prompt caching, so repeat runs over the same articles
+    don't pay to re-read them.
+    """
+    key = hashlib.blake2b(
+        f"{CLAUDE_MODEL}\n{max_tokens}\n{system}\n{context}\n{prompt}".encode(), digest_size=16
+    ).hexdigest()
+    cache_file = CACHE_DIR / "llm" / f"{key}.json"
+    
+    if (use_cache and cache_file.exists()
+            and datetime.now().timestamp() - cache_file.stat().st_mtime < cache_ttl):
+        print("  ✓ Using cached Claude response")
+        return json_loads(cache_file.read_bytes())["text"]
+    
+    # The cache breakpoint goes on the last stable block; everything before it is cached too
+    request = {}
+    content = [{"type": "text", "text": prompt}]
+    if system:
+        request["system"] = [{"type": "text", "text": system}]
+    if context:
+        content.insert(0, {"type": "text", "text": context, "cache_control": {"type": "ephemeral"}})
+    elif system:
+        request["system"][0]["cache_control"] = {"type": "ephemeral"}
+    
+    # Stream so long generations aren't cut off by the non-streaming request timeout
+    with client.messages.stream(
+        model=CLAUDE_MODEL,
+        max_tokens=max_tokens,
+        messages=[{"role": "user", "content": content}],
+        **request
+    ) as stream:
+        text = stream.get_final_message().content[0].text
+    
+    if use_cache:
+        # Write then rename, so an interrupted run can't leave a truncated entry behind
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file.write_bytes(json_dumps({"model": CLAUDE_MODEL, "text": text}))
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            # The response is already paid for - use it even if it can't be cached
+            print(f"    ⚠️  Could not cache Claude response: {e}")
+            try:
+                tmp_file.unlink(missing_ok=True)
+            except OSError:
+                pass
+    
+    return text
+
+
 def get_domain_from_url(url: str) -> str:
     """Extract clean domain name from URL for display."""
-    if not url:
+    # User JSON sources can put anything in "link" - only strings are parsed (and cached)
+    if not url or not isinstance(url, str):
         return "Unknown"
+    return parse_display_domain(url)
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_display_domain(url: str) -> str:
+    """Parse the display domain from a URL string, once per URL."""
     try:
-        from urllib.parse import urlparse
         parsed = urlparse(url)
-        domain = parsed.netloc.replace('www.', '')
-        # Capitalize nicely
-        return domain.split('.')[0].title() if domain else "Unknown"
-    except:
+    except ValueError:
         return "Unknown"
+    domain = parsed.netloc.replace('www.', '')
+    # Capitalize nicely
+    return domain.split('.')[0].title() if domain else "Unknown"
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate Claude token count (~4 characters per token)."""
+    return len(text) // 4
+
+
+def select_prompt_articles(
+    articles: list,
+    include_articles: Optional[FrozenSet[int]] = None,
+    token_budget: int = ARTICLES_TOKEN_BUDGET
+) -> list:
+    """Pick articles for the Claude prompt and trim their content to the token budget.
+    
+    Must-include and user-provided articles are ranked first, then by keyword
+    score, then the newest. Returns (article, content) pairs in article id order.
+    """
+    ranked = sorted(
+        articles,
+        key=lambda a: (
+            not (include_articles and a['id'] in include_articles),
+            not a.get('from_user_sources'),
+            -score_article(a)[0],
+            -a.get('pub_timestamp', 0)
+        )
+    )[:MAX_PROMPT_ARTICLES]
+    
+    selected = []
+    remaining = token_budget
+    for n, article in enumerate(ranked):
+        meta_tokens = estimate_tokens(
+            f"{article['title']} {article.get('source_display', article['source'])} {article.get('link', '')}"
+        ) + 10
+        
+        # Share what's left evenly across the articles still to place
+        share = remaining // (len(ranked) - n) - meta_tokens
+        body_len = min(MAX_ARTICLE_CHARS, max(MIN_ARTICLE_CHARS, share * 4))
+        body = article['content'][:body_len]
+        
+        cost = meta_tokens + estimate_tokens(body)
+        if cost > remaining:
+            break
+        remaining -= cost
+        selected.append((article, body))
+    
+    selected.sort(key=lambda x: x[0]['id'])
+    return selected
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL for duplicate detection: lowercase scheme and host, no utm_* params, fragment or trailing slash."""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip().lower().rstrip('/')
+    query = parts.query
+    # Most links carry no tracking params, so only split the query when there is one
+    if 'utm_' in query.lower():
+        query = '&'.join(
+            param for param in query.split('&')
+            if param and not param.lower().startswith('utm_')
+        )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), query, ''))
+
+
+def intern_article_strings(articles: list) -> None:
+    """Intern the source and date strings shared across articles, in place."""
+    for article in articles:
+        for field in ('source', 'source_display', 'published'):
+            value = article.get(field)
+            if isinstance(value, str):
+                article[field] = sys.intern(value)
 
 
 def deduplicate_articles(articles: list) -> list:
-    """Remove duplicate articles based on title similarity and URL."""
-    seen_hashes = set()
+    """Remove duplicate articles, keeping the first copy.
+    
+    Articles match on canonical URL (or normalized title when there is no
+    link), or when they carry the same substantial body text.
+    """
+    seen_keys = set()
+    seen_bodies = set()
     unique_articles = []
     
     for article in articles:
-        # Create hash from normalized title
-        title_normalized = re.sub(r'[^a-z0-9]', '', article['title'].lower())[:50]
-        url_hash = hashlib.md5(article.get('link', '').encode()).hexdigest()[:10]
+        link = article.get('link', '')
+        if link:
+            key = canonical_url(link)
+        else:
+            title = article['title'].lower()
+            if title.isascii():
+                key = title.encode('ascii').translate(None, ASCII_NON_ALNUM_BYTES).decode('ascii')[:50]
+            else:
+                key = NON_ALNUM_RE.sub('', title)[:50]
+        if key in seen_keys:
+            continue
         
-        # Use combination of title and URL
-        article_hash = f"{title_normalized}_{url_hash}"
+        # Syndicated copies of the same story often differ only in URL
+        body = article.get('content', '')
+        if len(body) >= DUPLICATE_BODY_MIN_CHARS:
+            if body in seen_bodies:
+                continue
+            seen_bodies.add(body)
         
-        if article_hash not in seen_hashes:
-            seen_hashes.add(article_hash)
-            unique_articles.append(article)
+        seen_keys.add(key)
+        unique_articles.append(article)
     
     return unique_articles
 
 
-def fetch_feeds(feeds: dict, days_back: int = 7) -> list:
-    """Fetch and parse RSS feeds, returning articles from the last N days."""
-    cutoff_date = datetime.now() - timedelta(days=days_back)
+def open_feed_cache() -> sqlite3.Connection:
+    """Open the feed validator cache, creating it on first use.
+    
+    Falls back to an empty in-memory cache (plain downloads) when the cache
+    directory can't be written.
+    """
+    try:
+        FEED_CACHE_DB.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(FEED_CACHE_DB)
+        create_feed_cache_tables(conn)
+        # Fail here rather than on the first write if the database is read-only
+        conn.execute("BEGIN IMMEDIATE")
+        conn.rollback()
+    except (OSError, sqlite3.Error):
+        conn = sqlite3.connect(":memory:")
+        create_feed_cache_tables(conn)
+    return conn
+
+
+def create_feed_cache_tables(conn: sqlite3.Connection) -> None:
+    """Create the feed cache tables if they don't exist yet."""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS feeds "
+        "(url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body BLOB, fetched REAL)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS parsed (hash TEXT PRIMARY KEY, entries BLOB, parsed REAL)"
+    )
+
+
+def parse_feed_date(raw: str) -> Optional[datetime]:
+    """Parse a feed date string as ISO 8601 (Atom) or RFC 822 (RSS), falling back to dateutil."""
+    for parse in (datetime.fromisoformat, email.utils.parsedate_to_datetime):
+        try:
+            pub_date = parse(raw)
+            break
+        except (ValueError, OverflowError, TypeError):
+            continue
+    else:
+        from dateutil import parser as date_parser  # Last resort only, so loaded on first use
+        try:
+            pub_date = date_parser.parse(raw)
+        except (ValueError, OverflowError, TypeError):
+            return None
+    return pub_date.replace(tzinfo=None) if pub_date.tzinfo else pub_date
+
+
+def cached_feed_body(cache: sqlite3.Connection, feed_url: str) -> Optional[bytes]:
+    """Return the body stored with a feed's validators, if there is one."""
+    row = cache.execute("SELECT body FROM feeds WHERE url = ?", (feed_url,)).fetchone()
+    return gzip.decompress(row[0]) if row else None
+
+
+def store_feed_response(
+    cache: sqlite3.Connection, feed_url: str, etag: Optional[str], last_modified: Optional[str], body: bytes
+) -> None:
+    """Record a feed's 200 response, replacing whatever was cached for it.
+    
+    Without an ETag or Last-Modified there is nothing to revalidate with,
+    so any older entry is dropped rather than left to answer a later 304.
+    """
+    if etag or last_modified:
+        cache.execute(
+            "INSERT OR REPLACE INTO feeds VALUES (?, ?, ?, ?, ?)",
+            (feed_url, etag, last_modified, gzip.compress(body), datetime.now().timestamp())
+        )
+    else:
+        cache.execute("DELETE FROM feeds WHERE url = ?", (feed_url,))
+
+
+def fetch_feed_fallback(feed_url: str, etag: Optional[str], last_modified: Optional[str]) -> httpx.Response:
+    """Retry a feed that failed in the async batch with a plain HTTP/1.1 conditional GET."""
+    headers = dict(HTTP_HEADERS)
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return httpx.get(feed_url, headers=headers, timeout=15.0, follow_redirects=True)
+
+
+def parse_feed_entries(body: bytes, cache: sqlite3.Connection) -> list:
+    """Return feedparser entries for a feed body, reusing a recent parse of the same bytes."""
+    key = hashlib.blake2b(body, digest_size=16).hexdigest()
+    now = datetime.now().timestamp()
+    
+    row = cache.execute(
+        "SELECT entries FROM parsed WHERE hash = ? AND parsed > ?", (key, now - PARSED_FEED_TTL)
+    ).fetchone()
+    if row:
+        return pickle.loads(row[0])
+    
+    entries = feedparser.parse(body).entries
+    try:
+        cache.execute("INSERT OR REPLACE INTO parsed VALUES (?, ?, ?)", (key, pickle.dumps(entries), now))
+    except (pickle.PicklingError, TypeError):
+        pass
+    return entries
+
+
+async def download_feeds(feeds: dict) -> dict:
+    """Download all feeds concurrently, returning {source_name: body}.
+    
+    Body is None when the download failed; feeds still pending after
+    FEED_BATCH_TIMEOUT are cancelled and left out of the result. Feeds that
+    answer 304 Not Modified return the body cached from their last 200.
+    """
+    host_limits = defaultdict(lambda: asyncio.Semaphore(MAX_REQUESTS_PER_HOST))
+    updates = []
+    
+    with closing(open_feed_cache()) as cache:
+        validators = {
+            url: (etag, last_modified)
+            for url, etag, last_modified in cache.execute("SELECT url, etag, last_modified FROM feeds")
+        }
+        
+        async def download(client, feed_url):
+            etag, last_modified = validators.get(feed_url, (None, None))
+            headers = {}
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+            
+            try:
+                async with host_limits[urlparse(feed_url).netloc]:
+                    response = await client.get(feed_url, headers=headers)
+            except Exception:
+                return None
+            
+            if response.status_code == 304 and headers:
+                body = cached_feed_body(cache, feed_url)
+                if body is not None:
+                    return body
+            
+            if response.status_code == 200:
+                updates.append((
+                    feed_url, response.headers.get('ETag'), response.headers.get('Last-Modified'), response.content
+                ))
+            return response.content
+        
+        async with httpx.AsyncClient(
+            http2=True, timeout=15.0, follow_redirects=True, headers=HTTP_HEADERS, limits=HTTP_LIMITS
+        ) as client:
+            tasks = {
+                source_name: asyncio.create_task(download(client, feed_url))
+                for source_name, feed_url in feeds.items()
+            }
+            pending = set()
+            if tasks:  # asyncio.wait refuses an empty set
+                _, pending = await asyncio.wait(tasks.values(), timeout=FEED_BATCH_TIMEOUT)
+            for task in pending:
+                task.cancel()
+        
+        for update in updates:
+            store_feed_response(cache, *update)
+        cache.commit()
+    
+    return {source_name: task.result() for source_name, task in tasks.items() if task not in pending}
+
+
+def fetch_feeds(feeds: dict, days_back: int = 7, bodies: Optional[dict] = None) -> list:
+    """Fetch and parse RSS feeds, returning articles from the last N days.
+    
+    Pass bodies from an earlier download_feeds() call to skip the download.
+    """
+    now = datetime.now()
+    cutoff_date = now - timedelta(days=days_back)
     articles = []
     
+    if bodies is None:
+        print(f"  Downloading {len(feeds)} feeds...")
+        bodies = asyncio.run(download_feeds(feeds))
+    
+    cache = open_feed_cache()
+    
+    # Feeds that failed to download are retried over HTTP/1.1, in parallel,
+    # still sending the validators from the last good fetch
+    fallback_pool = ThreadPoolExecutor(max_workers=FALLBACK_FETCH_WORKERS)
+    fallbacks = {}
+    for source_name, body in bodies.items():
+        if body is None:
+            feed_url = feeds[source_name]
+            validators = cache.execute(
+                "SELECT etag, last_modified FROM feeds WHERE url = ?", (feed_url,)
+            ).fetchone() or (None, None)
+            fallbacks[source_name] = fallback_pool.submit(
+                fetch_feed_fallback, feed_url, *validators
+            )
+    
     for source_name, feed_url in feeds.items():
         try:
-            print(f"  Fetching {source_name}...")
+            print(f"  Parsing {source_name}...")
             
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+            if source_name not in bodies:
+                print(f"    ⚠️  Timed out")
+                continue
             
-            try:
-                response = requests.get(feed_url, headers=headers, timeout=15)
-                feed = feedparser.parse(response.content)
-            except:
-                feed = feedparser.parse(feed_url)
+            # Popped so each raw feed can be freed once it's parsed
+            body = bodies.pop(source_name)
+            if body is None:
+                # Cached like a download_feeds response, so the next run can send a conditional GET
+                response = fallbacks[source_name].result()
+                if response.status_code == 304:
+                    body = cached_feed_body(cache, feed_url)
+                else:
+                    body = response.content
+                    if response.status_code == 200:
+                        store_feed_response(
+                            cache, feed_url, response.headers.get('ETag'), response.headers.get('Last-Modified'), body
+                        )
+            entries = parse_feed_entries(body, cache) if body is not None else []
             
-            if not feed.entries:
+            if not entries:
                 print(f"    ⚠️  No entries found")
                 continue
                 
-            for entry in feed.entries[:15]:
+            for entry in entries[:15]:
                 pub_date = None
-                for date_field in ['published', 'updated', 'created', 'pubDate']:
-                    if hasattr(entry, date_field):
-                        try:
-                            pub_date = date_parser.parse(getattr(entry, date_field))
-                            if pub_date.tzinfo:
-                                pub_date = pub_date.replace(tzinfo=None)
-                            break
-                        except:
-                            continue
+                parsed_date = entry.get('published_parsed') or entry.get('updated_parsed') or entry.get('created_parsed')
+                if parsed_date:
+                    pub_date = datetime(*parsed_date[:6])
+                else:
+                    # feedparser couldn't read the date - try the raw string ourselves
+                    for date_field in ['published', 'updated', 'created']:
+                        if date_field in entry:
+                            pub_date = parse_feed_date(entry[date_field])
+                            if pub_date:
+                                break
                 
                 if not pub_date:
-                    pub_date = datetime.now()
+                    pub_date = now
                 
                 if pub_date < cutoff_date:
                     continue
                 
-                content = ""
-                if hasattr(entry, 'summary'):
-                    content = entry.summary
-                elif hasattr(entry, 'description'):
-                    content = entry.description
-                elif hasattr(entry, 'content'):
-                    content = entry.content[0].value if entry.content else ""
+                content = entry.get('summary') or entry.get('description') or ""
+                if not content and entry.get('content'):
+                    content = entry.content[0].get('value', "")
                 
-                content = re.sub(r'<[^>]+>', '', content)
-                content = re.sub(r'\s+', ' ', content).strip()
+                content = HTML_TAG_RE.sub('', content)
+                content = WHITESPACE_RE.sub(' ', content).strip()
                 content = content[:2000]
                 
                 link = entry.get('link', '')
@@ -540,18 +1035,26 @@ def fetch_feeds(feeds: dict, days_back: int = 7) -> list:
         except Exception as e:
             print(f"    ⚠️  Error: {e}")
     
-    articles.sort(key=lambda x: x['pub_timestamp'], reverse=True)
+    # Drop expired parses so the cache only holds recent feed bodies
+    cache.execute("DELETE FROM parsed WHERE parsed <= ?", (datetime.now().timestamp() - PARSED_FEED_TTL,))
+    cache.commit()
+    cache.close()
+    fallback_pool.shutdown()
     
-    # Deduplicate
-    original_count = len(articles)
-    articles = deduplicate_articles(articles)
-    if original_count != len(articles):
-        print(f"  ✓ Removed {original_count - len(articles)} duplicates")
+    # Newest first, so deduplication keeps the latest copy of a story
+    articles.sort(key=lambda x: x['pub_timestamp'], reverse=True)
     
-    print(f"  ✓ Fetched {len(articles)} unique articles from RSS feeds")
+    print(f"  ✓ Fetched {len(articles)} articles from RSS feeds")
     return articles
 
 
+async def download_feeds_and_sources(feeds: dict, sources_folder: Optional[str]) -> tuple:
+    """Download feeds while user sources are read from disk, returning (bodies, user_articles)."""
+    if not sources_folder:
+        return await download_feeds(feeds), []
+    return await asyncio.gather(download_feeds(feeds), asyncio.to_thread(load_user_sources, sources_folder))
+
+
 def load_user_sources(sources_folder: str) -> list:
     """Load articles from user-provided sources folder."""
     articles = []
@@ -563,156 +1066,188 @@ def load_user_sources(sources_folder: str) -> list:
     
     print(f"  Loading user sources from {sources_folder}...")
     
-    for subfolder in [folder] + [f for f in folder.iterdir() if f.is_dir()]:
-        # Process text files
-        for txt_file in subfolder.glob("*.txt"):
-            if txt_file.name.lower() == 'readme.txt':
-                continue
+    # User sources have no dates of their own - stamp them all with the load time
+    now = datetime.now()
+    now_str = now.strftime("%d %B %Y")
+    now_ts = now.timestamp()
+    
+    def source_files(directory: Path, descend: bool):
+        """Yield files in directory (and its immediate subfolders) from one scandir pass each."""
+        subfolders = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        yield Path(entry.path)
+                    elif descend and entry.is_dir():
+                        subfolders.append(entry.path)
+        except OSError as e:
+            # An unreadable folder is skipped, like an unreadable file
+            print(f"    ⚠️  Error reading {directory}: {e}")
+            return
+        for subfolder in subfolders:
+            yield from source_files(subfolder, descend=False)
+    
+    def read_source_file(source_file: Path) -> list:
+        """Parse one source file into its articles."""
+        file_articles = []
+        suffix = source_file.suffix
+        if source_file.name.lower() in ('readme.txt', 'readme.md'):
+            return file_articles
+        
+        # Text files: a list of URLs, or article content
+        if suffix == '.txt':
             try:
-                content = txt_file.read_text(encoding='utf-8')
-                lines = content.strip().split('\n')
+                content = source_file.read_text(encoding='utf-8')
+                
+                # Check if it's a URL list - article text gives up at its first line
+                urls = []
+                for line in content.split('\n'):
+                    line = line.strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    if not line.startswith(('http://', 'https://')):
+                        urls = None
+                        break
+                    urls.append(line)
                 
-                # Check if it's a URL list
-                non_comment_lines = [l.strip() for l in lines if l.strip() and not l.strip().startswith('#')]
-                if all(line.startswith(('http://', 'https://')) for line in non_comment_lines):
-                    for url in non_comment_lines:
+                if urls is not None:
+                    for url in urls:
                         domain = get_domain_from_url(url)
-                        articles.append({
+                        file_articles.append({
                             "source": domain,
                             "source_display": domain,
                             "title": f"Article from {domain}",
                             "link": url,
                             "content": f"[URL: {url}]",
-                            "published": datetime.now().strftime("%d %B %Y"),
-                            "pub_timestamp": datetime.now().timestamp(),
+                            "published": now_str,
+                            "pub_timestamp": now_ts,
                             "from_user_sources": True
                         })
                 else:
                     # It's article content
-                    title = txt_file.stem.replace("_", " ").replace("-", " ").title()
-                    articles.append({
+                    title = source_file.stem.replace("_", " ").replace("-", " ").title()
+                    file_articles.append({
                         "source": "Curated",
                         "source_display": "Curated Source",
                         "title": title,
                         "link": "",
                         "content": content[:3000],
-                        "published": datetime.now().strftime("%d %B %Y"),
-                        "pub_timestamp": datetime.now().timestamp(),
+                        "published": now_str,
+                        "pub_timestamp": now_ts,
                         "from_user_sources": True
                     })
             except Exception as e:
-                print(f"    ⚠️  Error reading {txt_file}: {e}")
+                print(f"    ⚠️  Error reading {source_file}: {e}")
         
-        # Process JSON files
-        for json_file in subfolder.glob("*.json"):
+        # JSON files
+        elif suffix == '.json':
             try:
-                data = json.loads(json_file.read_text(encoding='utf-8'))
+                data = json_loads(source_file.read_bytes())
                 items = data if isinstance(data, list) else [data]
                 
                 for item in items:
                     link = item.get("link", item.get("url", ""))
+                    if not isinstance(link, str):
+                        link = ""
                     source = item.get("source", get_domain_from_url(link))
-                    articles.append({
+                    file_articles.append({
                         "source": source,
                         "source_display": source,
                         "title": item.get("title", "Untitled"),
                         "link": link,
                         "content": item.get("content", item.get("summary", ""))[:3000],
-                        "published": item.get("published", datetime.now().strftime("%d %B %Y")),
-                        "pub_timestamp": datetime.now().timestamp(),
+                        "published": item.get("published", now_str),
+                        "pub_timestamp": now_ts,
                         "from_user_sources": True
                     })
             except Exception as e:
-                print(f"    ⚠️  Error reading {json_file}: {e}")
+                print(f"    ⚠️  Error reading {source_file}: {e}")
         
-        # Process Markdown files
-        for md_file in subfolder.glob("*.md"):
-            if md_file.name.lower() == 'readme.md':
-                continue
+        # Markdown files
+        elif suffix == '.md':
             try:
-                content = md_file.read_text(encoding='utf-8')
-                title_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
-                title = title_match.group(1) if title_match else md_file.stem.replace("_", " ").title()
+                # Only the first 3000 chars are used, so don't read the rest
+                with open(source_file, encoding='utf-8') as f:
+                    content = f.read(3000)
+                title_match = MARKDOWN_TITLE_RE.search(content)
+                title = title_match.group(1) if title_match else source_file.stem.replace("_", " ").title()
                 
-                articles.append({
+                file_articles.append({
                     "source": "Curated",
                     "source_display": "Curated Source",
                     "title": title,
                     "link": "",
-                    "content": content[:3000],
-                    "published": datetime.now().strftime("%d %B %Y"),
-                    "pub_timestamp": datetime.now().timestamp(),
+                    "content": content,
+                    "published": now_str,
+                    "pub_timestamp": now_ts,
                     "from_user_sources": True
                 })
             except Exception as e:
-                print(f"    ⚠️  Error reading {md_file}: {e}")
+                print(f"    ⚠️  Error reading {source_file}: {e}")
+        
+        return file_articles
+    
+    # Files are read in parallel; map keeps them in directory order
+    with ThreadPoolExecutor(max_workers=USER_SOURCE_WORKERS) as executor:
+        for file_articles in executor.map(read_source_file, source_files(folder, descend=True)):
+            articles.extend(file_articles)
     
-    # Deduplicate user sources too
-    articles = deduplicate_articles(articles)
     print(f"  ✓ Loaded {len(articles)} user-provided sources")
     return articles
 
 
+def score_article(article: dict) -> tuple:
+    """Score an article by the priority keywords it mentions, returning (score, first 5 keywords)."""
+    text = f"{article['title']} {article['content']}".lower()
+    matched = [kw for kw_lower, kw in KEYWORDS_LOWER if kw_lower in text]
+    score = 3 * len(matched)
+    
+    if article.get('from_user_sources'):
+        score += 10
+    
+    return score, matched[:5]
+
+
 def generate_article_list(articles: list, output_format: str = "html") -> str:
     """Generate an interactive article list with checkboxes for easy selection."""
     
-    HIGH_PRIORITY_KEYWORDS = [
-        "investment", "investor", "private equity", "PE", "acquisition", "acquire",
-        "merger", "M&A", "funding", "capital", "valuation", "IPO", "stake",
-        "buy", "sell", "deal", "transaction", "billion", "million",
-        "global", "international", "cross-border", "export", "import", "trade",
-        "foreign", "overseas", "expansion", "enter", "market entry", "launch",
-        "Asia", "Europe", "Americas", "Middle East", "China", "India", "US", "UK",
-        "Germany", "France", "Dubai", "Singapore", "emerging market",
-        "revenue", "growth", "profit", "margin", "earnings", "forecast",
-        "outlook", "performance", "results", "quarter", "annual",
-        "strategy", "restructur", "pivot", "shift", "transform", "digital",
-        "CEO", "appoint", "hire", "depart", "leadership"
-    ]
-    
-    def score_article(article):
-        text = f"{article['title']} {article['content']}".lower()
-        score = 0
-        matched = []
-        
-        for kw in HIGH_PRIORITY_KEYWORDS:
-            if kw.lower() in text:
-                score += 3
-                if kw not in matched:
-                    matched.append(kw)
-        
-        if article.get('from_user_sources'):
-            score += 10
-        
-        return score, matched[:5]
-    
     def generate_synopsis(title, content):
         """Generate a brief synopsis from title and content."""
         # Clean content
         text = content[:500].strip()
-        # Get first sentence or first 150 chars
-        sentences = re.split(r'[.!?]', text)
-        if sentences and len(sentences[0]) > 20:
-            synopsis = sentences[0].strip()[:200]
+        # Get first sentence or first 200 chars
+        ends = [i for i in (text.find('.'), text.find('!'), text.find('?')) if i != -1]
+        first_sentence = text[:min(ends)] if ends else text
+        if len(first_sentence) > 20:
+            synopsis = first_sentence.strip()[:200]
         else:
             synopsis = text[:200]
         return synopsis + "..." if len(synopsis) >= 200 else synopsis
     
-    scored = []
+    # Annotate the articles in place rather than copying each one
     for i, article in enumerate(articles):
         score, keywords = score_article(article)
-        scored.append({
-            **article,
-            'index': i + 1,
-            'relevance_score': score,
-            'matched_keywords': keywords,
-            'synopsis': generate_synopsis(article['title'], article['content'])
-        })
-    
-    scored.sort(key=lambda x: x['relevance_score'], reverse=True)
-    
-    # Generate interactive HTML with checkboxes
-    html = """<!DOCTYPE html>
+        article['index'] = i + 1
+        article['relevance_score'] = score
+        article['matched_keywords'] = keywords
+        article['synopsis'] = generate_synopsis(article['title'], article['content'])
+    
+    scored = sorted(articles, key=lambda x: x['relevance_score'], reverse=True)
+    
+    # Filter button counts, in one pass
+    n_high = n_medium = n_low = 0
+    for article in scored:
+        score = article['relevance_score']
+        if score >= 9:
+            n_high += 1
+        elif score >= 3:
+            n_medium += 1
+        else:
+            n_low += 1
+    
+    # Generate interactive HTML with checkboxes - collected in parts and joined once
+    parts = ["""<!DOCTYPE html>
 <html>
 <head>
     <meta charset="utf-8">
@@ -868,11 +1403,11 @@ def generate_article_list(articles: list, output_format: str = "html") -> str:
     
     <div class="filters">
         <button class="filter-btn active" onclick="filterArticles('all')">All (""" + str(len(scored)) + """)</button>
-        <button class="filter-btn" onclick="filterArticles('high')">High (""" + str(len([a for a in scored if a['relevance_score'] >= 9])) + """)</button>
-        <button class="filter-btn" onclick="filterArticles('medium')">Medium (""" + str(len([a for a in scored if 3 <= a['relevance_score'] < 9])) + """)</button>
-        <button class="filter-btn" onclick="filterArticles('low')">Low (""" + str(len([a for a in scored if a['relevance_score'] < 3])) + """)</button>
+        <button class="filter-btn" onclick="filterArticles('high')">High (""" + str(n_high) + """)</button>
+        <button class="filter-btn" onclick="filterArticles('medium')">Medium (""" + str(n_medium) + """)</button>
+        <button class="filter-btn" onclick="filterArticles('low')">Low (""" + str(n_low) + """)</button>
     </div>
-"""
+"""]
     
     for article in scored:
         score = article['relevance_score']
@@ -888,7 +1423,7 @@ def generate_article_list(articles: list, output_format: str = "html") -> str:
         
         synopsis = article.get('synopsis', article['content'][:200])
         
-        html += f"""
+        parts.append(f"""
     <div class="article {rel_class}" data-relevance="{rel_class}">
         <input type="checkbox" id="article-{article['index']}" value="{article['index']}" onchange="updateSelection()">
         <div class="article-content">
@@ -902,9 +1437,9 @@ def generate_article_list(articles: list, output_format: str = "html") -> str:
             <div class="keywords">{keywords_html}</div>
         </div>
     </div>
-"""
+""")
     
-    html += """
+    parts.append("""
     <div class="instructions">
         <strong>📝 How to use:</strong>
         <ol>
@@ -963,15 +1498,20 @@ def generate_article_list(articles: list, output_format: str = "html") -> str:
         }
     </script>
 </body>
-</html>"""
+</html>""")
     
-    return html
+    return "".join(parts)
 
 
-def generate_executive_summary(sections_content: dict, api_key: str) -> str:
+def generate_executive_summary(
+    sections_content: dict,
+    api_key: str,
+    use_cache: bool = True,
+    cache_ttl: float = LLM_CACHE_TTL
+) -> Markup:
     """Generate simple 3-bullet executive summary as HTML."""
     
-    client = Anthropic(api_key=api_key)
+    client = get_claude_client(api_key)
     
     # Get all selected stories
     all_stories = []
@@ -1010,16 +1550,13 @@ Good morning,
 - [Third key theme and why it matters]
 - [Fourth key theme if relevant]"""
 
-    response = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=600,
-        messages=[{"role": "user", "content": prompt}]
-    )
-    
-    text = response.content[0].text.strip()
-    
-    # Convert to proper HTML
-    lines = text.split('\n')
+    text = call_claude(client, prompt, max_tokens=600, use_cache=use_cache, cache_ttl=cache_ttl)
+    return summary_to_html(text)
+
+
+def summary_to_html(text: str) -> Markup:
+    """Convert a plain-text executive summary (paragraphs and "- " bullets) to HTML."""
+    lines = text.strip().split('\n')
     html_parts = []
     bullets = []
     
@@ -1040,7 +1577,15 @@ Good morning,
     if bullets:
         html_parts.append('<ul>' + ''.join(f'<li>{b}</li>' for b in bullets) + '</ul>')
     
-    return '\n'.join(html_parts)
+    return Markup('\n'.join(html_parts))
+
+
+def group_stories_by_theme(stories: list, sub_themes: list) -> dict:
+    """Bucket stories by sub-theme in one pass, keeping the sub-theme order."""
+    by_theme = defaultdict(list)
+    for story in stories:
+        by_theme[story.get("sub_theme")].append(story)
+    return {theme: by_theme[theme] for theme in sub_themes}
 
 
 def categorize_and_write_newsletter(
@@ -1048,8 +1593,10 @@ def categorize_and_write_newsletter(
     api_key: Optional[str] = None,
     custom_instructions: Optional[str] = None,
     stories_per_section: int = 3,
-    include_articles: Optional[List[int]] = None,
-    exclude_articles: Optional[List[int]] = None
+    include_articles: Optional[FrozenSet[int]] = None,
+    exclude_articles: Optional[FrozenSet[int]] = None,
+    use_cache: bool = True,
+    cache_ttl: float = LLM_CACHE_TTL
 ) -> dict:
     """Use Claude to categorize articles and write newsletter sections."""
     
@@ -1062,28 +1609,41 @@ def categorize_and_write_newsletter(
     if not custom_instructions:
         custom_instructions = os.environ.get("EXTRA_PROMPT", "")
     
-    client = Anthropic(api_key=api_key)
+    client = get_claude_client(api_key)
+    
+    # Number articles as --list-articles does, so include/exclude ids stay valid after filtering
+    for i, article in enumerate(articles):
+        article['id'] = i + 1
+    
+    # Sets, so the per-article membership tests are O(1) even for long id lists
+    include_articles = frozenset(include_articles) if include_articles else None
+    exclude_articles = frozenset(exclude_articles) if exclude_articles else None
     
     # Filter articles
     if exclude_articles:
-        articles = [a for i, a in enumerate(articles) if (i+1) not in exclude_articles]
+        articles = [a for a in articles if a['id'] not in exclude_articles]
+    
+    articles_by_id = {a['id']: a for a in articles}
     
     # Prepare articles text
-    articles_text = ""
-    for i, article in enumerate(articles[:60]):
+    article_blocks = []
+    for article, body in select_prompt_articles(articles, include_articles):
         user_flag = " [PRIORITIZE]" if article.get('from_user_sources') else ""
-        include_flag = " [MUST INCLUDE]" if include_articles and (i+1) in include_articles else ""
-        articles_text += f"""
+        include_flag = " [MUST INCLUDE]" if include_articles and article['id'] in include_articles else ""
+        article_blocks.append(f"""
 ---
-[{i+1}]{user_flag}{include_flag}
+[{article['id']}]{user_flag}{include_flag}
 Title: {article['title']}
 Source: {article.get('source_display', article['source'])}
 Link: {article.get('link', 'N/A')}
-Content: {article['content'][:800]}
+Content: {body}
 ---
-"""
+""")
+    articles_text = "".join(article_blocks)
     
-    prompt = f"""You are writing a newsletter for senior board members, investors, corporate development leaders, and portfolio directors in B2B media and events businesses.
+    # Static instructions first, then the articles - together the prefix Claude can cache -
+    # then the run-specific instructions and output format
+    system = """You are writing a newsletter for senior board members, investors, corporate development leaders, and portfolio directors in B2B media and events businesses.
 
 AUDIENCE: Time-poor, commercially literate readers interested in signals, not noise.
 
@@ -1120,12 +1680,12 @@ CRITICAL RULES - READ CAREFULLY:
 - All other [MUST INCLUDE] articles go in MARKET SIGNALS
 - There is NO LIMIT on articles per section — include ALL selected articles
 - Each article gets a 4-5 sentence synopsis written in the style above
-- Emphasise: market health, valuation signals, capital flows, M&A activity, risk, and strategic optionality
-
-{f"ADDITIONAL INSTRUCTIONS: {custom_instructions}" if custom_instructions else ""}
-
-ARTICLES TO PROCESS (include ALL marked [MUST INCLUDE]):
-{articles_text}
+- Emphasise: market health, valuation signals, capital flows, M&A activity, risk, and strategic optionality"""
+    
+    context = f"""ARTICLES TO PROCESS (include ALL marked [MUST INCLUDE]):
+{articles_text}"""
+    
+    prompt = f"""{f"ADDITIONAL INSTRUCTIONS: {custom_instructions}" if custom_instructions else ""}
 
 For each article, write a synopsis that:
 1. Opens with what happened (1 sentence)
@@ -1134,6 +1694,13 @@ For each article, write a synopsis that:
 
 IMPORTANT: Count the [MUST INCLUDE] articles. Your output MUST contain the same number of stories total across all sections.
 
+EXECUTIVE SUMMARY - also write the newsletter's opening summary of the stories you selected:
+1. Start with "Good morning,"
+2. One sentence (max 25 words) setting the context — what's the overall signal this week?
+3. Then 3-4 bullet points, each starting "- ", highlighting the key themes for board/investor attention
+4. Focus on: market health, valuation signals, capital flows, M&A activity, risk, strategic implications
+Each bullet should be 1-2 lines, written in plain English, pointing to what matters and why. No markdown.
+
 Return JSON:
 {{
     "sections": {{
@@ -1148,24 +1715,25 @@ Return JSON:
         }},
         "deals": {{"stories": [...]}},
         "hires_fires": {{"stories": [...]}}
-    }}
+    }},
+    "executive_summary": "Good morning,\\n\\n[One sentence context]\\n\\n- [First key theme and why it matters]\\n- [Second key theme and why it matters]\\n- [Third key theme and why it matters]"
 }}
 
 Return ONLY valid JSON."""
 
     print("  Writing newsletter...")
     
-    response = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=12000,  # Increased to handle all selected articles
-        messages=[{"role": "user", "content": prompt}]
+    # Increased max_tokens to handle all selected articles
+    response_text = call_claude(
+        client, prompt, max_tokens=12000, use_cache=use_cache, cache_ttl=cache_ttl,
+        system=system, context=context
     )
     
-    response_text = response.content[0].text
-    
+    # The JSON object runs from the first '{' to the last '}'
+    start, end = response_text.find('{'), response_text.rfind('}')
+    payload = response_text[start:end + 1] if start != -1 and end > start else response_text
     try:
-        json_match = re.search(r'\{[\s\S]*\}', response_text)
-        result = json.loads(json_match.group()) if json_match else json.loads(response_text)
+        result = json_loads(payload)
     except json.JSONDecodeError as e:
         print(f"  ⚠️  JSON error: {e}")
         raise
@@ -1173,44 +1741,146 @@ Return ONLY valid JSON."""
     # Enrich with original data
     enriched_sections = {}
     
-    for section_key, section_config in SECTIONS.items():
+    for section_key, section_config in SECTION_ORDER:
         section_data = result.get("sections", {}).get(section_key, {})
         
         enriched_stories = []
         for story in section_data.get("stories", []):
             # Convert article_index to int (AI sometimes returns as string)
             try:
-                idx = int(story.get("article_index", 1)) - 1
+                orig = articles_by_id.get(int(story.get("article_index")))
             except (ValueError, TypeError):
-                idx = 0
+                continue
+            
+            if orig is None:
+                continue
             
-            if 0 <= idx < len(articles):
-                orig = articles[idx]
+            # If source is generic, use domain from URL
+            if orig.get('source_display', orig.get('source', '')) in ['User Source', 'Curated', '']:
                 link = orig.get('link', '')
-                source_display = orig.get('source_display', orig.get('source', ''))
-                
-                # If source is generic, use domain from URL
-                if source_display in ['User Source', 'Curated', '']:
-                    source_display = get_domain_from_url(link) if link else 'Curated Source'
-                
-                enriched_stories.append({
-                    "headline": story.get("headline", orig["title"]),
-                    "summary": story.get("summary", ""),
-                    "source": orig.get("source", ""),
-                    "source_display": source_display,
-                    "link": link,
-                    "published": orig["published"],
-                    "sub_theme": story.get("sub_theme")
-                })
+                orig['source_display'] = get_domain_from_url(link) if link else 'Curated Source'
+            
+            # Stories carry only what Claude wrote; source, link and date come from the article
+            enriched_stories.append({
+                "headline": story.get("headline", orig["title"]),
+                # Claude writes summaries as ready-to-embed text; mark once instead of |safe per render
+                "summary": Markup(story.get("summary", "")),
+                "sub_theme": story.get("sub_theme"),
+                "article": orig
+            })
         
         enriched_sections[section_key] = {
             "title": section_config["title"],
+            "title_lower": section_config["title_lower"],
+            "title_html": section_config["title_html"],
             "icon": section_config["icon"],
             "stories": enriched_stories,
             "sub_themes": section_config.get("sub_themes")
         }
+        
+        # Grouped once here so every output format renders from the same buckets
+        if section_config.get("sub_themes"):
+            enriched_sections[section_key]["stories_by_theme"] = group_stories_by_theme(
+                enriched_stories, section_config["sub_themes"]
+            )
+    
+    # Written in the same call, so the summary no longer needs a second round trip
+    summary_text = result.get("executive_summary")
+    executive_summary = summary_to_html(summary_text) if isinstance(summary_text, str) and summary_text.strip() else None
     
-    return {"sections": enriched_sections}
+    return {"sections": enriched_sections, "executive_summary": executive_summary}
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_logo_url(logo: Optional[str]) -> Optional[str]:
+    """Inline a local logo file as a data URL; anything else is returned unchanged."""
+    if not logo or logo.startswith(("http://", "https://", "data:")):
+        return logo
+    path = Path(logo).expanduser()
+    if not path.is_file():
+        return logo
+    mime_type = mimetypes.guess_type(path.name)[0] or "image/png"
+    return f"data:{mime_type};base64," + base64.b64encode(path.read_bytes()).decode("ascii")
+
+
+@functools.lru_cache(maxsize=8)
+def render_logo_banner(logo_url: Optional[str]) -> Markup:
+    """Render the logo banner once per logo URL."""
+    return Markup(TEMPLATES["logo_banner"].render(logo_url=logo_url))
+
+
+@functools.lru_cache(maxsize=8)
+def render_footer(footer_text: Optional[str]) -> Markup:
+    """Render the footer once per footer text (which may contain HTML)."""
+    if footer_text is not None:
+        footer_text = Markup(footer_text)
+    return Markup(TEMPLATES["footer"].render(footer_text=footer_text))
+
+
+def render_section_html(section_data: dict) -> Markup:
+    """Render a section's stories (grouped under sub-themes if it has them) to one HTML block."""
+    story_template = TEMPLATES["story"]
+    
+    if not section_data.get("sub_themes"):
+        return Markup("\n".join(
+            story_template.render(story=story, source_link=True) for story in section_data["stories"]
+        ))
+    
+    parts = []
+    for sub_theme, theme_stories in section_data["stories_by_theme"].items():
+        parts.append(Markup('<div class="sub-theme">{}</div>').format(sub_theme))
+        parts.extend(story_template.render(story=story, source_link=False) for story in theme_stories)
+    return Markup("\n".join(parts))
+
+
+def render_markdown(
+    content: dict,
+    title: str,
+    date: str,
+    footer_text: str = None,
+    executive_summary: str = None,
+    out: Optional[TextIO] = None
+) -> Optional[str]:
+    """Render newsletter to Markdown with plain string writes (mirrors MARKDOWN_TEMPLATE).
+    
+    Writes into out when given (returning None), otherwise returns the text.
+    """
+    buffer = out is None
+    if buffer:
+        out = io.StringIO()
+    
+    def write_story(story, heading):
+        article = story["article"]
+        out.write(f"{heading} {story['headline']}\n\n")
+        out.write(f"*{article['source_display']} • {article['published']}*\n\n")
+        out.write(f"{story['summary']}\n\n")
+        if article.get("link"):
+            out.write(f"[Read source →]({article['link']})\n\n")
+        out.write("---\n\n")
+    
+    out.write(f"# {title}\n\n")
+    out.write("*Intelligence for the global B2B media, exhibitions & events industry*\n\n")
+    out.write(f"**{date}**\n\n---\n\n")
+    
+    if executive_summary:
+        out.write(f"{executive_summary}\n\n---\n\n")
+    
+    for section_data in content.get("sections", {}).values():
+        out.write(f"## {section_data['icon']} {section_data['title']}\n\n")
+        
+        if not section_data.get("stories"):
+            out.write(f"*No significant {section_data['title_lower']} this period.*\n\n")
+        elif section_data.get("sub_themes"):
+            for sub_theme, theme_stories in section_data["stories_by_theme"].items():
+                out.write(f"### {sub_theme}\n\n")
+                for story in theme_stories:
+                    write_story(story, "####")
+        else:
+            for story in section_data["stories"]:
+                write_story(story, "###")
+    
+    out.write(f"---\n\n*{footer_text or 'Published by Second Curve Consulting'}*")
+    return out.getvalue() if buffer else None
 
 
 def render_newsletter(
@@ -1219,22 +1889,71 @@ def render_newsletter(
     title: str = "The Second Curves Media & Events Brief",
     footer_text: str = None,
     executive_summary: str = None,
-    logo_url: str = None
-) -> str:
-    """Render newsletter to HTML or Markdown."""
-    from jinja2 import Template
+    logo_url: str = None,
+    out: Optional[TextIO] = None
+) -> Optional[str]:
+    """Render newsletter to HTML or Markdown.
+    
+    Writes into out as it renders when given (returning None), otherwise returns the text.
+    """
+    sections = content.get("sections", {})
+    date = datetime.now().strftime("%d %B %Y")
+    
+    if output_format != "html":
+        return render_markdown(content, title, date, footer_text, executive_summary, out)
     
-    template_str = HTML_TEMPLATE if output_format == "html" else MARKDOWN_TEMPLATE
-    template = Template(template_str)
+    buffer = out is None
+    if buffer:
+        out = io.StringIO()
     
-    return template.render(
+    chunks = TEMPLATES["html"].generate(
         title=title,
-        date=datetime.now().strftime("%d %B %Y"),
+        css=NEWSLETTER_CSS_MIN,
+        date=date,
         executive_summary=executive_summary,
-        sections=content.get("sections", {}),
-        footer_text=footer_text,
-        logo_url=logo_url
+        sections=tuple(sections.items()),
+        stories_html={
+            key: render_section_html(section_data)
+            for key, section_data in sections.items() if section_data["stories"]
+        },
+        logo_banner=render_logo_banner(logo_url),
+        footer_html=render_footer(footer_text)
     )
+    # Trailing whitespace is held back, since it may run on into the next chunk.
+    # Chunks can be Markup - joined as plain str so nothing is escaped twice
+    pending = ""
+    for chunk in chunks:
+        chunk = pending + str(chunk)
+        text = chunk.rstrip()
+        pending = chunk[len(text):]
+        out.write(HTML_WHITESPACE_RE.sub('\n', text))
+    out.write(HTML_WHITESPACE_RE.sub('\n', pending))
+    
+    return out.getvalue() if buffer else None
+
+
+def render_formats(
+    content: dict,
+    output_formats: tuple = ("html", "markdown"),
+    title: str = "The Second Curves Media & Events Brief",
+    footer_text: str = None,
+    executive_summary: str = None,
+    logo_url: str = None,
+    outs: Optional[Dict[str, TextIO]] = None
+) -> Dict[str, Optional[str]]:
+    """Render several output formats concurrently, returning {format: newsletter}.
+    
+    Formats with a stream in outs are written there instead (their value is None).
+    """
+    outs = outs or {}
+    with ThreadPoolExecutor(max_workers=len(output_formats)) as executor:
+        futures = {
+            fmt: executor.submit(
+                render_newsletter, content, fmt, title, footer_text, executive_summary, logo_url, outs.get(fmt)
+            )
+            for fmt in output_formats
+        }
+    return {fmt: future.result() for fmt, future in futures.items()}
 
 
 def generate_newsletter(
@@ -1248,11 +1967,19 @@ def generate_newsletter(
     footer_text: Optional[str] = None,
     recipient_name: str = "Reader",
     list_articles_only: bool = False,
-    include_articles: Optional[List[int]] = None,
-    exclude_articles: Optional[List[int]] = None,
-    logo_url: Optional[str] = None
-) -> str:
-    """Main function to generate newsletter."""
+    include_articles: Optional[FrozenSet[int]] = None,
+    exclude_articles: Optional[FrozenSet[int]] = None,
+    logo_url: Optional[str] = None,
+    use_cache: bool = True,
+    cache_ttl: float = LLM_CACHE_TTL,
+    out_files: Optional[Dict[str, Path]] = None
+) -> Union[str, Dict[str, Union[str, Path]]]:
+    """Main function to generate newsletter.
+    
+    With output_format="both", returns {"html": ..., "markdown": ...} from a single run.
+    With out_files ({format: path}), each format is streamed straight to its file as
+    it renders and out_files is returned instead.
+    """
     
     if not api_key:
         api_key = os.environ.get("ANTHROPIC_API_KEY")
@@ -1264,17 +1991,25 @@ def generate_newsletter(
     print("=" * 60)
     
     print(f"\n[1/5] Fetching articles...")
-    articles = fetch_feeds(feeds, days_back)
+    print(f"  Downloading {len(feeds)} feeds...")
+    # User sources are read from disk while the feeds download - only parsing waits for both
+    bodies, user_articles = asyncio.run(download_feeds_and_sources(feeds, sources_folder))
+    articles = fetch_feeds(feeds, days_back, bodies)
     
     if sources_folder:
-        print(f"\n[2/5] Loading user sources...")
-        user_articles = load_user_sources(sources_folder)
+        print(f"\n[2/5] Adding {len(user_articles)} user sources...")
         articles = user_articles + articles
-        # Deduplicate combined list
-        articles = deduplicate_articles(articles)
     else:
         print(f"\n[2/5] No user sources folder...")
     
+    # One pass over the combined list - user sources come first, so they win over feed copies
+    original_count = len(articles)
+    articles = deduplicate_articles(articles)
+    if original_count != len(articles):
+        print(f"  ✓ Removed {original_count - len(articles)} duplicates")
+    # Each feed name and date repeats across its articles - keep one copy of each
+    intern_article_strings(articles)
+    
     print(f"\n  Total unique articles: {len(articles)}")
     
     if not articles:
@@ -1289,16 +2024,42 @@ def generate_newsletter(
         api_key,
         stories_per_section=stories_per_section,
         include_articles=include_articles,
-        exclude_articles=exclude_articles
+        exclude_articles=exclude_articles,
+        use_cache=use_cache,
+        cache_ttl=cache_ttl
     )
     
     print(f"\n[4/5] Generating summary...")
-    exec_summary = generate_executive_summary(content["sections"], api_key)
+    exec_summary = content.get("executive_summary")
+    if not any(section.get("stories") for section in content["sections"].values()):
+        # Nothing to summarise - drop any summary Claude wrote and don't make another call
+        exec_summary = None
+        print("  No stories selected, skipping")
+    elif exec_summary:
+        print("  ✓ Written with the newsletter")
+    else:
+        exec_summary = generate_executive_summary(
+            content["sections"], api_key, use_cache=use_cache, cache_ttl=cache_ttl
+        )
     
     print(f"\n[5/5] Rendering...")
-    newsletter = render_newsletter(
-        content, output_format, title, footer_text, exec_summary, logo_url
-    )
+    if out_files:
+        # Files are opened only now, so a failed run doesn't leave empty ones behind
+        with ExitStack() as stack:
+            outs = {
+                fmt: stack.enter_context(open(path, "w", encoding="utf-8"))
+                for fmt, path in out_files.items()
+            }
+            render_formats(content, tuple(outs), title, footer_text, exec_summary, logo_url, outs)
+        newsletter = out_files
+    elif output_format == "both":
+        newsletter = render_formats(
+            content, ("html", "markdown"), title, footer_text, exec_summary, logo_url
+        )
+    else:
+        newsletter = render_newsletter(
+            content, output_format, title, footer_text, exec_summary, logo_url
+        )
     
     print("\n" + "=" * 60)
     print("✅ DONE!")
@@ -1307,10 +2068,16 @@ def generate_newsletter(
     return newsletter
 
 
+def parse_article_ids(value: str) -> FrozenSet[int]:
+    """Parse a comma-separated list of article numbers (argparse type for --include/--exclude)."""
+    return frozenset(int(x) for x in value.split(","))
+
+
 def main():
     parser = argparse.ArgumentParser(description="Generate The Second Curves Media & Events Brief")
     
-    parser.add_argument("--output", "-o", choices=["html", "markdown", "md"], default="html")
+    parser.add_argument("--output", "-o", choices=["html", "markdown", "md", "both"], default="html",
+                        help="'both' writes <out-file>.html and <out-file>.md from one run")
     parser.add_argument("--days", "-d", type=int, default=7)
     parser.add_argument("--stories", "-s", type=int, default=3)
     parser.add_argument("--title", "-t", default="The Second Curves Media & Events Brief")
@@ -1320,17 +2087,29 @@ def main():
     parser.add_argument("--footer", default="Published by Second Curve Consulting")
     parser.add_argument("--recipient", default="Reader")
     parser.add_argument("--list-articles", action="store_true")
-    parser.add_argument("--include", type=str, help="Article numbers to include")
-    parser.add_argument("--exclude", type=str, help="Article numbers to exclude")
+    parser.add_argument("--include", type=parse_article_ids, help="Article numbers to include")
+    parser.add_argument("--exclude", type=parse_article_ids, help="Article numbers to exclude")
     parser.add_argument("--logo", type=str, help="URL or path to logo")
+    parser.add_argument("--no-cache", action="store_true", help="Always call Claude, ignoring cached responses")
+    parser.add_argument("--cache-ttl", type=float, default=LLM_CACHE_TTL / 3600,
+                        help="Hours a cached Claude response is reused (default: 24)")
     
     args = parser.parse_args()
     
-    include = [int(x.strip()) for x in args.include.split(",")] if args.include else None
-    exclude = [int(x.strip()) for x in args.exclude.split(",")] if args.exclude else None
+    if args.output == "both" and not args.out_file:
+        parser.error("--output both requires --out-file")
     
     output_format = "markdown" if args.output == "md" else args.output
     
+    # Newsletters are rendered straight into their files; the article list is written below
+    out_files = None
+    if args.out_file and not args.list_articles:
+        if output_format == "both":
+            out_file = Path(args.out_file)
+            out_files = {"html": out_file.with_suffix(".html"), "markdown": out_file.with_suffix(".md")}
+        else:
+            out_files = {output_format: args.out_file}
+    
     try:
         result = generate_newsletter(
             days_back=args.days,
@@ -1342,21 +2121,40 @@ def main():
             footer_text=args.footer,
             recipient_name=args.recipient,
             list_articles_only=args.list_articles,
-            include_articles=include,
-            exclude_articles=exclude,
-            logo_url=args.logo
+            include_articles=args.include,
+            exclude_articles=args.exclude,
+            logo_url=resolve_logo_url(args.logo),
+            use_cache=not args.no_cache,
+            cache_ttl=args.cache_ttl * 3600,
+            out_files=out_files
         )
         
-        if args.out_file:
+        if isinstance(result, dict):
+            for out_file in result.values():
+                print(f"📄 Saved to: {out_file}")
+        elif args.out_file:
             with open(args.out_file, "w", encoding="utf-8") as f:
                 f.write(result)
             print(f"📄 Saved to: {args.out_file}")
         else:
             print(result)
             
+    except (OSError, ValueError) as e:
+        print(f"\n❌ Error: {e}", file=sys.stderr)
+        sys.exit(2)
     except Exception as e:
-        print(f"\n❌ Error: {e}")
-        raise
+        # anthropic is only imported once a client is built, so look it up rather than import it here
+        anthropic = sys.modules.get("anthropic")
+        if anthropic is None or not isinstance(e, anthropic.APIError):
+            raise
+        print(f"\n❌ Claude API error: {e}", file=sys.stderr)
+        sys.exit(2)
+    
+    if args.out_file:
+        # Everything is on disk - skip interpreter teardown of anthropic/httpx
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(0)
 
 
 if __name__ == "__main__":